@@ -1,11 +1,28 @@
+import os
+
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
+# Env vars set by hosting platforms; LinkedIn authwalls direct requests from these IPs
+_CLOUD_ENV_MARKERS = ("RENDER", "FLY_REGION", "K_SERVICE", "DYNO", "AWS_EXECUTION_ENV")
+
+
+def _detect_cloud_env() -> bool:
+    return any(os.environ.get(var) for var in _CLOUD_ENV_MARKERS)
+
 
 class Settings(BaseSettings):
     openai_api_key: str = ""
     scrapfly_api_key: str = ""
     linkedin_rate_limit_delay: float = 3.0
+    scrapfly_rate_limit_delay: float = 1.0
     max_urls_per_batch: int = 10
+    scrape_concurrency: int = 3
+    llm_concurrency: int = 10
+    research_concurrency: int = 8
+    cloud_env: bool = Field(default_factory=_detect_cloud_env)
+    cache_ttl_seconds: float = 3600.0
+    cache_max_entries: int = 1024
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
@@ -1,12 +1,27 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.config import settings
 from app.routers import generate, health
+from app.services import ai_generator, linkedin_scraper, web_researcher
 
-app = FastAPI(title="OpenSesame", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tier 2 never runs on cloud hosts, so don't pay for a Chromium process there
+    if not settings.cloud_env:
+        await linkedin_scraper.start_browser()
+    yield
+    await linkedin_scraper.aclose()
+    await ai_generator.aclose()
+    await web_researcher.aclose()
+
+
+app = FastAPI(title="OpenSesame", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
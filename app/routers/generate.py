@@ -3,41 +3,115 @@ from __future__ import annotations
 import asyncio
 import logging
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from openai import BadRequestError
 
 from app.config import settings
-from app.models.schemas import GenerateRequest, GenerateResponse, OpenerResult
-from app.services.ai_generator import generate_opener
-from app.services.linkedin_scraper import scrape_profile
+from app.models.schemas import (
+    GenerateRequest,
+    GenerateResponse,
+    OpenerResult,
+    ProfileData,
+    ResearchResult,
+)
+from app.services.ai_generator import generate_opener, generate_openers_batch
+from app.services.cache import TTLCache
+from app.services.linkedin_scraper import (
+    is_profile_cached,
+    normalize_linkedin_url,
+    scrape_profile,
+)
 from app.services.web_researcher import research_prospect
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Finished openers keyed by URL plus every request option that shapes them
+_OPENER_CACHE: TTLCache[tuple, OpenerResult] = TTLCache(
+    ttl=settings.cache_ttl_seconds, maxsize=settings.cache_max_entries
+)
 
-async def _process_single(
+
+def _manual_text(url: str, request: GenerateRequest) -> str | None:
+    """Pasted profile text for ``url``, under any spelling of the same profile URL."""
+    if url in request.manual_profiles:
+        return request.manual_profiles[url]
+    target = normalize_linkedin_url(url)
+    for key, text in request.manual_profiles.items():
+        if normalize_linkedin_url(key) == target:
+            return text
+    return None
+
+
+def _cache_key(url: str, request: GenerateRequest) -> tuple:
+    return (
+        normalize_linkedin_url(url),
+        request.must_include,
+        request.char_limit,
+        request.tone,
+        request.research_depth,
+        _manual_text(url, request),
+    )
+
+
+async def _prepare_single(
     url: str,
     request: GenerateRequest,
-    semaphore: asyncio.Semaphore,
-) -> OpenerResult:
-    async with semaphore:
-        try:
-            # Step 1: Scrape LinkedIn profile
-            manual_text = request.manual_profiles.get(url)
+    scrape_semaphore: asyncio.Semaphore,
+) -> OpenerResult | tuple[ProfileData, list[ResearchResult]]:
+    """Scrape and research one URL; returns a finished OpenerResult on failure."""
+    try:
+        # Step 1: Scrape LinkedIn profile. Pasted text and cached profiles need
+        # no network, so they skip the scrape queue and research starts at once.
+        manual_text = _manual_text(url, request)
+        if manual_text or is_profile_cached(url):
             profile = await scrape_profile(url, manual_text=manual_text)
+        else:
+            async with scrape_semaphore:
+                profile = await scrape_profile(url, manual_text=manual_text)
+
+        if profile.scrape_tier == "failed":
+            detail = profile.raw_text or "All scraping tiers failed"
+            return OpenerResult(
+                url=url,
+                scrape_tier="failed",
+                error=f"Scrape failed: {detail}. Please paste profile text manually.",
+            )
+
+        # Step 2: Web research — needs the profile, but runs while other URLs
+        # are still scraping
+        research = await research_prospect(profile, depth=request.research_depth)
+        return profile, research
+
+    except Exception as e:
+        logger.exception("Error processing %s", url)
+        return OpenerResult(url=url, error=str(e))
 
-            if profile.scrape_tier == "failed":
-                detail = profile.raw_text or "All scraping tiers failed"
-                return OpenerResult(
-                    url=url,
-                    scrape_tier="failed",
-                    error=f"Scrape failed: {detail}. Please paste profile text manually.",
-                )
 
-            # Step 2: Web research (concurrent with nothing — profile is needed first)
-            research = await research_prospect(profile, depth=request.research_depth)
+def _build_result(
+    url: str, profile: ProfileData, research: list[ResearchResult], opener: str
+) -> OpenerResult:
+    snippets = [s for r in research for s in r.snippets]
+
+    return OpenerResult(
+        url=url,
+        name=profile.name,
+        opener=opener,
+        research_snippets=snippets[:5],
+        scrape_tier=profile.scrape_tier,
+    )
 
-            # Step 3: Generate opener via AI
+
+async def _generate_single(
+    url: str,
+    request: GenerateRequest,
+    profile: ProfileData,
+    research: list[ResearchResult],
+    llm_semaphore: asyncio.Semaphore,
+) -> OpenerResult:
+    try:
+        async with llm_semaphore:
             opener = await generate_opener(
                 profile=profile,
                 research=research,
@@ -45,26 +119,71 @@ async def _process_single(
                 char_limit=request.char_limit,
                 tone=request.tone,
             )
+    except Exception as e:
+        logger.exception("Error processing %s", url)
+        return OpenerResult(url=url, error=str(e))
+    return _build_result(url, profile, research, opener)
 
-            snippets = []
-            for r in research:
-                snippets.extend(r.snippets)
-
-            return OpenerResult(
-                url=url,
-                name=profile.name,
-                opener=opener,
-                research_snippets=snippets[:5],
-                scrape_tier=profile.scrape_tier,
-            )
 
+async def _generate_batch(
+    urls: list[str],
+    contexts: list[tuple[ProfileData, list[ResearchResult]]],
+    request: GenerateRequest,
+    llm_semaphore: asyncio.Semaphore,
+) -> list[OpenerResult]:
+    """Step 3: Generate every opener in one AI call, falling back to one call per URL."""
+    if len(contexts) > 1:
+        try:
+            async with llm_semaphore:
+                openers = await generate_openers_batch(
+                    contexts,
+                    must_include=request.must_include,
+                    char_limit=request.char_limit,
+                    tone=request.tone,
+                )
+        except (ValueError, BadRequestError):
+            # A malformed reply, or a 400 that one prospect's content or the
+            # combined prompt size can trigger; per-URL calls isolate it
+            logger.warning("Batched generation unusable, retrying per URL", exc_info=True)
         except Exception as e:
-            logger.exception("Error processing %s", url)
-            return OpenerResult(url=url, error=str(e))
+            logger.exception("Batched generation failed for %d URLs", len(urls))
+            return [OpenerResult(url=url, error=str(e)) for url in urls]
+        else:
+            return [
+                _build_result(url, profile, research, opener)
+                for url, (profile, research), opener in zip(urls, contexts, openers)
+            ]
 
+    tasks = [
+        _generate_single(url, request, profile, research, llm_semaphore)
+        for url, (profile, research) in zip(urls, contexts)
+    ]
+    return list(await asyncio.gather(*tasks))
 
-@router.post("/api/generate", response_model=GenerateResponse)
-async def generate(request: GenerateRequest):
+
+async def _process_single(
+    url: str,
+    request: GenerateRequest,
+    scrape_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+) -> OpenerResult:
+    """Run the whole pipeline for one URL, with its own AI call."""
+    key = _cache_key(url, request)
+    cached = _OPENER_CACHE.get(key)
+    if cached:
+        return _with_url(cached, url)
+
+    prepared = await _prepare_single(url, request, scrape_semaphore)
+    if isinstance(prepared, OpenerResult):
+        return prepared
+    profile, research = prepared
+    result = await _generate_single(url, request, profile, research, llm_semaphore)
+    if not result.error:
+        _OPENER_CACHE.set(key, result)
+    return result
+
+
+def _check_request(request: GenerateRequest) -> None:
     if not settings.openai_api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
 
@@ -74,8 +193,101 @@ async def generate(request: GenerateRequest):
             detail=f"Maximum {settings.max_urls_per_batch} URLs per batch",
         )
 
-    semaphore = asyncio.Semaphore(3)  # Max 3 concurrent profile processes
-    tasks = [_process_single(url, request, semaphore) for url in request.urls]
-    results = await asyncio.gather(*tasks)
 
-    return GenerateResponse(results=list(results))
+def _group_urls(request: GenerateRequest) -> tuple[list[str], dict[str, str]]:
+    """Normalized key per submitted URL, plus the first URL submitted for each key.
+
+    The same profile pasted twice (or with/without www.) is only processed once.
+    """
+    keys = [normalize_linkedin_url(url) for url in request.urls]
+    first_url: dict[str, str] = {}
+    for key, url in zip(keys, request.urls):
+        first_url.setdefault(key, url)
+    return keys, first_url
+
+
+def _with_url(result: OpenerResult, url: str) -> OpenerResult:
+    return result if result.url == url else result.model_copy(update={"url": url})
+
+
+@router.post("/api/generate", response_model=GenerateResponse)
+async def generate(request: GenerateRequest) -> Response:
+    _check_request(request)
+
+    # Scraping is rate-limited upstream; LLM calls are not, so they get their own budget
+    scrape_semaphore = asyncio.Semaphore(settings.scrape_concurrency)
+    llm_semaphore = asyncio.Semaphore(settings.llm_concurrency)
+
+    keys, first_url = _group_urls(request)
+
+    by_key: dict[str, OpenerResult] = {}
+    misses = []
+    for key, url in first_url.items():
+        cached = _OPENER_CACHE.get(_cache_key(url, request))
+        if cached:
+            by_key[key] = cached
+        else:
+            misses.append(key)
+
+    prepared = await asyncio.gather(
+        *(_prepare_single(first_url[key], request, scrape_semaphore) for key in misses)
+    )
+    ready_keys = []
+    contexts = []
+    for key, item in zip(misses, prepared):
+        if isinstance(item, OpenerResult):
+            by_key[key] = item
+        else:
+            ready_keys.append(key)
+            contexts.append(item)
+
+    if contexts:
+        generated = await _generate_batch(
+            [first_url[key] for key in ready_keys], contexts, request, llm_semaphore
+        )
+        for key, result in zip(ready_keys, generated):
+            by_key[key] = result
+            if not result.error:
+                _OPENER_CACHE.set(_cache_key(result.url, request), result)
+
+    # Fan results back out in request order, each under the URL as submitted
+    results = [_with_url(by_key[key], url) for key, url in zip(keys, request.urls)]
+
+    # Every result is already a validated OpenerResult, so serialize directly
+    # instead of letting response_model validate the whole payload again
+    body = GenerateResponse.model_construct(results=results).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/api/generate/stream")
+async def generate_stream(request: GenerateRequest) -> StreamingResponse:
+    """Like /api/generate, but streams each result as an NDJSON line once it's ready.
+
+    Each URL gets its own AI call instead of one batched call, so the first
+    opener arrives as soon as its own pipeline finishes.
+    """
+    _check_request(request)
+
+    keys, first_url = _group_urls(request)
+    scrape_semaphore = asyncio.Semaphore(settings.scrape_concurrency)
+    llm_semaphore = asyncio.Semaphore(settings.llm_concurrency)
+
+    async def lines():
+        tasks = [
+            asyncio.create_task(
+                _process_single(url, request, scrape_semaphore, llm_semaphore)
+            )
+            for url in first_url.values()
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                key = normalize_linkedin_url(result.url)
+                for url in (u for k, u in zip(keys, request.urls) if k == key):
+                    yield _with_url(result, url).model_dump_json().encode() + b"\n"
+        finally:
+            # Client went away mid-stream; don't keep scraping for nobody
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from openai import AsyncOpenAI
+import io
+import json
+import re
+from collections.abc import Callable
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 from app.config import settings
 from app.models.schemas import ProfileData, ResearchResult
@@ -42,64 +47,126 @@ home-testing kit — curious how you're thinking about scaling DTC ops alongside
 validation side."
 """
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+BATCH MODE: You will receive several prospects, each under a "### PROSPECT n" header. \
+Write one opener per prospect, each following every rule above. Respond with a JSON object \
+of the form {"openers": ["...", "..."]} holding exactly one opener string per prospect, \
+in prospect order.
+"""
 
-def _build_user_prompt(
-    profile: ProfileData,
-    research: list[ResearchResult],
-    must_include: str,
-    char_limit: int,
-    tone: str,
-) -> str:
-    parts = [f"PROSPECT PROFILE:\n- Name: {profile.name}"]
+# Greedy, so it runs up to the last ".", "!" or "?" that is followed by a space
+_LAST_SENTENCE_END_RE = re.compile(r".*[.!?](?= )", re.DOTALL)
+
+_client: AsyncOpenAI | None = None
+
+
+def _get_client() -> AsyncOpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        # HTTP/2 multiplexes a batch's concurrent completions over one connection
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=DefaultAsyncHttpxClient(http2=True),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Release the OpenAI client's connection pool; called on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _write_profile(
+    w: Callable[[str], object], profile: ProfileData, research: list[ResearchResult]
+) -> None:
+    w(f"PROSPECT PROFILE:\n- Name: {profile.name}\n")
     if profile.headline:
-        parts.append(f"- Headline: {profile.headline}")
+        w(f"- Headline: {profile.headline}\n")
     if profile.summary:
-        parts.append(f"- Summary: {profile.summary}")
+        w(f"- Summary: {profile.summary}\n")
     if profile.experience:
-        parts.append(f"- Experience: {profile.experience}")
+        w(f"- Experience: {profile.experience}\n")
     if profile.education:
-        parts.append(f"- Education: {profile.education}")
+        w(f"- Education: {profile.education}\n")
     if profile.skills:
-        parts.append(f"- Skills: {profile.skills}")
-
-    if research:
-        has_snippets = any(r.snippets for r in research)
-        if has_snippets:
-            parts.append("\nWEB RESEARCH FINDINGS:")
-            idx = 1
-            for r in research:
-                if r.snippets:
-                    parts.append(f"\n[Source: {r.query}]")
-                    for s in r.snippets[:3]:
-                        parts.append(f"{idx}. {s}")
-                        idx += 1
-
-    parts.append(f"\nTONE: {tone}")
-    parts.append(f"MAX CHARACTERS: {char_limit}")
+        w(f"- Skills: {profile.skills}\n")
+
+    sources = [r for r in research if r.snippets]
+    if sources:
+        w("\nWEB RESEARCH FINDINGS:\n")
+        idx = 1
+        for r in sources:
+            w(f"\n[Source: {r.query}]\n")
+            for s in r.snippets[:3]:
+                w(f"{idx}. {s}\n")
+                idx += 1
+
+
+def _write_options(
+    w: Callable[[str], object], must_include: str, char_limit: int, tone: str
+) -> None:
+    w(f"\nTONE: {tone}\nMAX CHARACTERS: {char_limit}\n")
     if must_include:
-        parts.append(
+        w(
             f"MUST INCLUDE (mandatory — override any conflicting style rules): "
-            f"{must_include}"
+            f"{must_include}\n"
         )
 
-    parts.append(
+
+def _build_user_prompt(
+    profile: ProfileData,
+    research: list[ResearchResult],
+    must_include: str,
+    char_limit: int,
+    tone: str,
+) -> str:
+    buf = io.StringIO()
+    w = buf.write
+    _write_profile(w, profile, research)
+    _write_options(w, must_include, char_limit, tone)
+    w(
         "\nWrite a single personalized cold outreach opener for this prospect. "
         "Prioritize recent company news, personal posts, or unique career moves "
         "over generic profile facts."
     )
-    return "\n".join(parts)
+    return buf.getvalue()
+
+
+def _build_batch_prompt(
+    items: list[tuple[ProfileData, list[ResearchResult]]],
+    must_include: str,
+    char_limit: int,
+    tone: str,
+) -> str:
+    buf = io.StringIO()
+    w = buf.write
+    for i, (profile, research) in enumerate(items, 1):
+        w(f"### PROSPECT {i}\n")
+        _write_profile(w, profile, research)
+        w("\n")
+    _write_options(w, must_include, char_limit, tone)
+    w(
+        f"\nWrite one personalized cold outreach opener for each of the {len(items)} "
+        "prospects above; MAX CHARACTERS applies to each opener. "
+        "Prioritize recent company news, personal posts, or unique career moves "
+        "over generic profile facts."
+    )
+    return buf.getvalue()
 
 
 def _enforce_char_limit(text: str, limit: int) -> str:
-    text = text.strip().strip('"').strip("'").strip()
+    text = text.strip().strip("\"'").strip()
     if len(text) <= limit:
         return text
     # Trim at last sentence boundary within limit
     truncated = text[:limit]
-    for sep in [". ", "! ", "? "]:
-        idx = truncated.rfind(sep)
-        if idx > limit // 3:
-            return truncated[: idx + 1]
+    match = _LAST_SENTENCE_END_RE.match(truncated)
+    if match and match.end() - 1 > limit // 3:
+        return match.group()
     # Fall back to last space
     idx = truncated.rfind(" ")
     if idx > limit // 3:
@@ -114,10 +181,9 @@ async def generate_opener(
     char_limit: int = 300,
     tone: str = "professional",
 ) -> str:
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
     user_prompt = _build_user_prompt(profile, research, must_include, char_limit, tone)
 
-    response = await client.chat.completions.create(
+    response = await _get_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -129,3 +195,40 @@ async def generate_opener(
 
     raw = response.choices[0].message.content or ""
     return _enforce_char_limit(raw, char_limit)
+
+
+async def generate_openers_batch(
+    items: list[tuple[ProfileData, list[ResearchResult]]],
+    must_include: str = "",
+    char_limit: int = 300,
+    tone: str = "professional",
+) -> list[str]:
+    """Generate openers for several prospects with a single chat completion.
+
+    Raises ValueError if the reply doesn't hold exactly one opener per prospect.
+    """
+    user_prompt = _build_batch_prompt(items, must_include, char_limit, tone)
+
+    response = await _get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.8,
+        max_tokens=400 * len(items),
+        response_format={"type": "json_object"},
+    )
+
+    raw = response.choices[0].message.content or ""
+    try:
+        openers = json.loads(raw)["openers"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed batch reply: {e}") from e
+    if (
+        not isinstance(openers, list)
+        or len(openers) != len(items)
+        or not all(isinstance(o, str) for o in openers)
+    ):
+        raise ValueError("Batch reply does not hold one opener per prospect")
+    return [_enforce_char_limit(o, char_limit) for o in openers]
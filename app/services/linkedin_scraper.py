@@ -3,16 +3,45 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+from collections.abc import Awaitable, Callable
+from enum import Enum
 
 import httpx
+import orjson
+from aiolimiter import AsyncLimiter
 
 from app.config import settings
 from app.models.schemas import ProfileData
+from app.services.cache import TTLCache
 from app.services.profile_parser import parse_profile
 
 logger = logging.getLogger(__name__)
 
-_rate_lock = asyncio.Lock()
+_LINKEDIN_RE = re.compile(r"https?://(www\.)?linkedin\.com")
+
+# Leaky-bucket limiters pacing the actual outbound requests: one for direct
+# LinkedIn hits (Tier 1/2) and a separate one for the Scrapfly API.
+_LINKEDIN_LIMITER = AsyncLimiter(
+    max_rate=1, time_period=max(settings.linkedin_rate_limit_delay, 0.001)
+)
+_SCRAPFLY_LIMITER = AsyncLimiter(
+    max_rate=1, time_period=max(settings.scrapfly_rate_limit_delay, 0.001)
+)
+
+# Successfully scraped profiles keyed by normalized URL
+_PROFILE_CACHE: TTLCache[str, ProfileData] = TTLCache(
+    ttl=settings.cache_ttl_seconds, maxsize=settings.cache_max_entries
+)
+
+# Tier 2 shares one Chromium process; each profile gets its own cheap context
+_playwright = None
+_browser = None
+_browser_lock = asyncio.Lock()
+
+# Shared connection pool for every outbound scrape request, so keep-alive
+# connections (and their TLS sessions) are reused across tiers and profiles.
+# HTTP/2 lets concurrent requests to the same host share one connection.
+_client: httpx.AsyncClient | None = None
 
 BROWSER_HEADERS = {
     "User-Agent": (
@@ -29,23 +58,92 @@ BROWSER_HEADERS = {
 }
 
 
+# Profile data (OpenGraph tags, JSON-LD) sits near the top of the page, so
+# there's no need to download multi-MB bodies in full
+_MAX_HTML_BYTES = 300_000
+
+# At least one of these appears on any page parse_profile can extract a name
+# from; authwall and JS-gate pages have none of them.
+_PROFILE_MARKERS = ("og:title", "application/ld+json", "publicIdentifier")
+
+
+def _has_profile_markers(html: str) -> bool:
+    return any(marker in html for marker in _PROFILE_MARKERS)
+
+
+class FailClass(Enum):
+    """Why a scraping tier failed, used to decide whether escalating can help."""
+
+    BLOCKED_BY_IP = "blocked_by_ip"
+    PARSE_FAILED = "parse_failed"
+    TRANSIENT = "transient"
+    UNAVAILABLE = "unavailable"
+
+
+TierResult = tuple[str | None, FailClass | None, str]
+
+
 def normalize_linkedin_url(url: str) -> str:
     url = url.strip().rstrip("/")
     if not url.startswith("http"):
         url = "https://" + url
-    url = re.sub(r"https?://(www\.)?linkedin\.com", "https://www.linkedin.com", url)
+    url = _LINKEDIN_RE.sub("https://www.linkedin.com", url)
     return url
 
 
-async def _rate_limit():
-    async with _rate_lock:
-        await asyncio.sleep(settings.linkedin_rate_limit_delay)
+async def _get_browser():
+    """Return the shared Chromium browser, launching it if needed."""
+    global _playwright, _browser
+    if _browser is not None and _browser.is_connected():
+        return _browser
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            from playwright.async_api import async_playwright
+
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=True)
+    return _browser
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared scrape client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+    return _client
 
 
-async def _scrape_scrapfly(url: str, retries: int = 3) -> tuple[str | None, str]:
+async def start_browser() -> None:
+    """Launch the Tier 2 browser ahead of the first request; failures are logged."""
+    try:
+        await _get_browser()
+    except Exception as e:
+        logger.warning("Tier 2 browser unavailable: %s", e)
+
+
+async def aclose() -> None:
+    """Release pooled connections and the browser; called on application shutdown."""
+    global _client, _playwright, _browser
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
+
+
+async def _scrape_scrapfly(url: str, retries: int = 3) -> TierResult:
     """Tier 0: Scrapfly API with JS rendering + ASP bypass."""
     if not settings.scrapfly_api_key:
-        return None, "Scrapfly: No API key configured"
+        return None, FailClass.UNAVAILABLE, "Scrapfly: No API key configured"
 
     params = {
         "key": settings.scrapfly_api_key,
@@ -55,101 +153,165 @@ async def _scrape_scrapfly(url: str, retries: int = 3) -> tuple[str | None, str]
         "country": "US",
         "headers[Accept-Language]": "en-US,en;q=0.5",
     }
+    # Mirror the local profile cache; CACHE_TTL_SECONDS=0 disables both
+    if settings.cache_ttl_seconds > 0:
+        params["cache"] = "true"
+        params["cache_ttl"] = str(int(settings.cache_ttl_seconds))
     last_reason = ""
-    async with httpx.AsyncClient(timeout=155.0) as client:
-        for attempt in range(retries):
-            try:
-                resp = await client.get(
-                    "https://api.scrapfly.io/scrape", params=params
+    for attempt in range(retries):
+        try:
+            async with _SCRAPFLY_LIMITER:
+                resp = await _get_client().get(
+                    "https://api.scrapfly.io/scrape", params=params, timeout=155.0
                 )
-                data = resp.json()
-
-                if resp.status_code != 200:
-                    error = data.get("result", {}).get("error", {})
-                    code = error.get("code", "")
-                    msg = error.get("message", resp.status_code)
-                    retryable = error.get("retryable", False)
-                    last_reason = f"Scrapfly: {code} - {msg}"
-                    logger.warning("%s for %s (attempt %d)", last_reason, url, attempt + 1)
-                    if retryable and attempt < retries - 1:
-                        await asyncio.sleep(3)
-                        continue
-                    return None, last_reason
-
-                html = data.get("result", {}).get("content", "")
-                if not html or len(html) < 500:
-                    return None, "Scrapfly: Response too short (likely blocked)"
-                return html, ""
-            except Exception as e:
-                last_reason = f"Scrapfly: {e}"
-                logger.info("%s for %s (attempt %d)", last_reason, url, attempt + 1)
-                if attempt < retries - 1:
+            data = orjson.loads(resp.content)
+
+            if resp.status_code != 200:
+                error = data.get("result", {}).get("error", {})
+                code = error.get("code", "")
+                msg = error.get("message", resp.status_code)
+                retryable = error.get("retryable", False)
+                last_reason = f"Scrapfly: {code} - {msg}"
+                logger.warning("%s for %s (attempt %d)", last_reason, url, attempt + 1)
+                if retryable and attempt < retries - 1:
                     await asyncio.sleep(3)
                     continue
-                return None, last_reason
-    return None, last_reason
+                return None, FailClass.TRANSIENT, last_reason
 
+            html = data.get("result", {}).get("content", "")
+            if not html or len(html) < 500:
+                return (
+                    None,
+                    FailClass.PARSE_FAILED,
+                    "Scrapfly: Response too short (likely blocked)",
+                )
+            if not _has_profile_markers(html):
+                return None, FailClass.PARSE_FAILED, "Scrapfly: HTML lacks profile markers"
+            return html, None, ""
+        except Exception as e:
+            last_reason = f"Scrapfly: {e}"
+            logger.info("%s for %s (attempt %d)", last_reason, url, attempt + 1)
+            if attempt < retries - 1:
+                await asyncio.sleep(3)
+                continue
+            return None, FailClass.TRANSIENT, last_reason
+    return None, FailClass.TRANSIENT, last_reason
 
-async def _scrape_tier1(url: str) -> tuple[str | None, str]:
-    """Tier 1: httpx with browser-like headers. Returns (html, fail_reason)."""
+
+async def _read_capped(resp: httpx.Response, max_bytes: int) -> str:
+    """Read a streamed response body, stopping once ``max_bytes`` have arrived."""
+    chunks = []
+    total = 0
+    async for chunk in resp.aiter_bytes():
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= max_bytes:
+            break
+    body = b"".join(chunks)[:max_bytes]
+    return body.decode(resp.encoding or "utf-8", errors="replace")
+
+
+async def _scrape_tier1(url: str) -> TierResult:
+    """Tier 1: httpx with browser-like headers. Returns (html, fail_class, reason)."""
     try:
-        async with httpx.AsyncClient(
-            headers=BROWSER_HEADERS,
-            follow_redirects=True,
-            timeout=15.0,
-        ) as client:
-            resp = await client.get(url)
+        async with _LINKEDIN_LIMITER, _get_client().stream(
+            "GET", url, headers=BROWSER_HEADERS, follow_redirects=True, timeout=15.0
+        ) as resp:
             if resp.status_code != 200:
                 reason = f"Tier 1: HTTP {resp.status_code}"
                 logger.info("%s for %s", reason, url)
-                return None, reason
-            html = resp.text
+                # LinkedIn answers 999 to requests it has blocked outright
+                if resp.status_code == 999:
+                    return None, FailClass.BLOCKED_BY_IP, reason
+                return None, FailClass.TRANSIENT, reason
             if "authwall" in resp.url.path or "login" in resp.url.path:
                 reason = "Tier 1: LinkedIn authwall redirect (cloud IP blocked)"
                 logger.info("%s for %s", reason, url)
-                return None, reason
-            if len(html) < 500:
-                return None, "Tier 1: Response too short (likely blocked)"
-            return html, ""
+                return None, FailClass.BLOCKED_BY_IP, reason
+            html = await _read_capped(resp, _MAX_HTML_BYTES)
+        if len(html) < 500:
+            return (
+                None,
+                FailClass.PARSE_FAILED,
+                "Tier 1: Response too short (likely blocked)",
+            )
+        if not _has_profile_markers(html):
+            return None, FailClass.PARSE_FAILED, "Tier 1: HTML lacks profile markers"
+        return html, None, ""
     except Exception as e:
         reason = f"Tier 1: {e}"
         logger.info("%s for %s", reason, url)
-        return None, reason
+        return None, FailClass.TRANSIENT, reason
+
+
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "stylesheet", "font", "media"})
+
 
+async def _block_heavy_resources(route) -> None:
+    """Tier 2 route handler: skip assets the profile text doesn't depend on."""
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
-async def _scrape_tier2(url: str) -> tuple[str | None, str]:
-    """Tier 2: Playwright headless Chromium. Returns (html, fail_reason)."""
+
+async def _scrape_tier2(url: str) -> TierResult:
+    """Tier 2: Playwright headless Chromium. Returns (html, fail_class, reason)."""
     try:
-        from playwright.async_api import async_playwright
+        browser = await _get_browser()
     except ImportError:
-        return None, "Tier 2: Playwright not installed"
+        return None, FailClass.UNAVAILABLE, "Tier 2: Playwright not installed"
+    except Exception as e:
+        reason = f"Tier 2: Browser unavailable ({e})"
+        logger.info("%s for %s", reason, url)
+        return None, FailClass.UNAVAILABLE, reason
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=BROWSER_HEADERS["User-Agent"],
-            )
+        context = await browser.new_context(
+            user_agent=BROWSER_HEADERS["User-Agent"],
+        )
+        try:
+            await context.route("**/*", _block_heavy_resources)
             page = await context.new_page()
-            await page.route(
-                "**/*.{png,jpg,jpeg,gif,svg,css,woff,woff2,ttf}",
-                lambda route: route.abort(),
-            )
-            await page.goto(url, wait_until="domcontentloaded", timeout=20000)
+            async with _LINKEDIN_LIMITER:
+                await page.goto(url, wait_until="domcontentloaded", timeout=20000)
             await page.wait_for_timeout(2000)
             current_url = page.url
             if "authwall" in current_url or "login" in current_url:
-                await browser.close()
-                return None, "Tier 2: LinkedIn authwall redirect"
+                return None, FailClass.BLOCKED_BY_IP, "Tier 2: LinkedIn authwall redirect"
             html = await page.content()
-            await browser.close()
-            if len(html) < 500:
-                return None, "Tier 2: Response too short"
-            return html, ""
+        finally:
+            await context.close()
+        if len(html) < 500:
+            return None, FailClass.PARSE_FAILED, "Tier 2: Response too short"
+        if not _has_profile_markers(html):
+            return None, FailClass.PARSE_FAILED, "Tier 2: HTML lacks profile markers"
+        return html, None, ""
     except Exception as e:
         reason = f"Tier 2: {e}"
         logger.info("%s for %s", reason, url)
-        return None, reason
+        return None, FailClass.TRANSIENT, reason
+
+
+async def _fetch_and_parse(
+    fetch: Callable[[str], Awaitable[TierResult]],
+    url: str,
+    tier: str,
+    label: str,
+) -> tuple[ProfileData | None, FailClass | None, str]:
+    """Run one scraping tier and parse its HTML. Returns (profile, fail_class, reason)."""
+    html, fail, reason = await fetch(url)
+    if not html:
+        return None, fail, reason
+    # Parsing a full profile page is CPU-bound; keep it off the event loop
+    profile = await asyncio.to_thread(parse_profile, html, url, tier=tier)
+    if profile.name:
+        return profile, None, ""
+    return None, FailClass.PARSE_FAILED, f"{label}: Got HTML but could not parse name"
+
+
+def is_profile_cached(url: str) -> bool:
+    return _PROFILE_CACHE.get(normalize_linkedin_url(url)) is not None
 
 
 async def scrape_profile(
@@ -161,39 +323,66 @@ async def scrape_profile(
     if manual_text:
         return parse_profile(manual_text, url, tier="manual")
 
-    await _rate_limit()
+    cached = _PROFILE_CACHE.get(url)
+    if cached:
+        return cached
 
-    fail_reasons = []
+    profile = await _scrape_uncached(url)
+    if profile.scrape_tier != "failed":
+        _PROFILE_CACHE.set(url, profile)
+    return profile
 
-    # Tier 0: Scrapfly (JS-rendered HTML — most reliable)
-    html, reason = await _scrape_scrapfly(url)
-    if html:
-        profile = parse_profile(html, url, tier="scrapfly")
-        if profile.name:
-            return profile
-        fail_reasons.append("Scrapfly: Got HTML but could not parse name")
-    elif reason:
-        fail_reasons.append(reason)
 
-    # Tier 1: httpx direct
-    html, reason = await _scrape_tier1(url)
-    if html:
-        profile = parse_profile(html, url, tier="tier1")
-        if profile.name:
-            return profile
-        fail_reasons.append("Tier 1: Got HTML but could not parse name")
-    elif reason:
-        fail_reasons.append(reason)
+async def _scrape_uncached(url: str) -> ProfileData:
+    # Tier 0 (Scrapfly) and Tier 1 (httpx direct) race each other; the first
+    # tier to produce a named profile wins and the other is cancelled.
+    racing = [
+        asyncio.create_task(
+            _fetch_and_parse(_scrape_scrapfly, url, "scrapfly", "Scrapfly")
+        ),
+    ]
+    if not settings.cloud_env:
+        racing.append(
+            asyncio.create_task(
+                _fetch_and_parse(_scrape_tier1, url, "tier1", "Tier 1")
+            )
+        )
+    pending = set(racing)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in racing:
+                if task in done:
+                    profile, _, _ = task.result()
+                    if profile:
+                        return profile
+    finally:
+        for task in pending:
+            task.cancel()
+
+    outcomes = [task.result() for task in racing]
+    fail_reasons = [reason for _, _, reason in outcomes if reason]
 
-    # Tier 2: Playwright
-    html, reason = await _scrape_tier2(url)
-    if html:
-        profile = parse_profile(html, url, tier="tier2")
-        if profile.name:
-            return profile
-        fail_reasons.append("Tier 2: Got HTML but could not parse name")
-    elif reason:
+    # Direct requests (Tier 1 and Tier 2) from a blocked IP can't succeed,
+    # so don't spend ~20s launching Playwright just to hit the authwall again.
+    if settings.cloud_env:
+        fail_reasons.append("Tier 1/2: Skipped (cloud IPs are blocked by LinkedIn)")
+        return _failed_profile(url, fail_reasons)
+    if any(fail is FailClass.BLOCKED_BY_IP for _, fail, _ in outcomes):
+        return _failed_profile(url, fail_reasons)
+
+    # Tier 2: Playwright — only once both faster tiers have failed
+    profile, _, reason = await _fetch_and_parse(_scrape_tier2, url, "tier2", "Tier 2")
+    if profile:
+        return profile
+    if reason:
         fail_reasons.append(reason)
 
+    return _failed_profile(url, fail_reasons)
+
+
+def _failed_profile(url: str, fail_reasons: list[str]) -> ProfileData:
     detail = " → ".join(fail_reasons) if fail_reasons else "All tiers failed"
     return ProfileData(url=url, scrape_tier="failed", raw_text=detail)
@@ -1,41 +1,89 @@
 from __future__ import annotations
 
-import json
-import re
-
-from bs4 import BeautifulSoup
+import lxml.html
+import orjson
+from lxml import etree
 
 from app.models.schemas import ProfileData
 
+_OG_TITLE_XPATH = etree.XPath('string(//meta[@property="og:title"]/@content)')
+_OG_DESC_XPATH = etree.XPath('string(//meta[@property="og:description"]/@content)')
+# Only ld+json blocks that can hold a Person node, filtered inside libxml2 so the
+# page's other scripts never surface as Python objects
+_PERSON_LD_JSON_XPATH = etree.XPath(
+    """//script[@type="application/ld+json"][contains(., '"Person"')]/text()""",
+    smart_strings=False,
+)
+# Text nodes outside <script>/<style>/<template>, matching what BeautifulSoup's
+# get_text() returned
+_VISIBLE_TEXT_XPATH = etree.XPath(
+    "//text()[not(parent::script or parent::style or ancestor::template)]",
+    smart_strings=False,
+)
+
+_OG_PROPERTIES = ("og:title", "og:description")
+_HEAD_CHUNK_CHARS = 16_384
+
+# Plain-text sections: a header line ends with the section name and the body
+# runs until a line starting with one of the stop words (or the end of text).
+_EXPERIENCE_SECTION = ("experience", ("education", "skills"))
+_EDUCATION_SECTION = ("education", ("skills", "interests"))
+
 
 def parse_profile(html: str, url: str, tier: str) -> ProfileData:
     """Parse LinkedIn profile HTML into structured data using multiple strategies."""
     if tier == "manual":
         return _parse_plain_text(html, url)
 
-    soup = BeautifulSoup(html, "lxml")
+    # Fast path: without a Person JSON-LD block the OpenGraph tags decide the
+    # result, and those live in <head>, so don't build the whole page's tree.
+    if '"Person"' not in html:
+        og = _scan_head_opengraph(html)
+        if og is not None:
+            profile = _opengraph_profile(*og, url, tier)
+            if profile and profile.name:
+                return profile
+
+    try:
+        tree = _build_tree(html)
+    except etree.ParserError:
+        # Nothing parseable: empty, whitespace-only, comment-only or doctype-only
+        return _parse_lines([], url, tier)
 
     # Strategy 1: JSON-LD
-    profile = _parse_json_ld(soup, url, tier)
+    profile = _parse_json_ld(tree, url, tier)
     if profile and profile.name:
         return profile
 
     # Strategy 2: OpenGraph meta tags
-    profile = _parse_opengraph(soup, url, tier)
+    profile = _parse_opengraph(tree, url, tier)
     if profile and profile.name:
         return profile
 
-    # Strategy 3: Raw text fallback
-    text = soup.get_text(separator="\n", strip=True)
-    return _parse_plain_text(text, url, tier)
+    # Strategy 3: Raw text fallback. text_content() would glue adjacent
+    # elements together, so collect stripped lines per text node instead.
+    lines = [
+        stripped
+        for node in _VISIBLE_TEXT_XPATH(tree)
+        for line in node.splitlines()
+        if (stripped := line.strip())
+    ]
+    return _parse_lines(lines, url, tier)
+
+
+def _build_tree(html: str) -> lxml.html.HtmlElement:
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"))
 
 
-def _parse_json_ld(soup: BeautifulSoup, url: str, tier: str) -> ProfileData | None:
-    scripts = soup.find_all("script", type="application/ld+json")
-    for script in scripts:
+def _parse_json_ld(tree: lxml.html.HtmlElement, url: str, tier: str) -> ProfileData | None:
+    for raw in _PERSON_LD_JSON_XPATH(tree):
         try:
-            data = json.loads(script.string or "")
-        except (json.JSONDecodeError, TypeError):
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
             continue
 
         if isinstance(data, list):
@@ -52,16 +100,19 @@ def _parse_json_ld(soup: BeautifulSoup, url: str, tier: str) -> ProfileData | No
         name = data.get("name", "")
         headline = data.get("jobTitle", "") or data.get("description", "")
 
-        experience_parts = []
-        for interaction in data.get("interactionStatistic", []):
-            if isinstance(interaction, dict):
-                experience_parts.append(str(interaction))
+        experience_parts = [
+            str(interaction)
+            for interaction in data.get("interactionStatistic", [])
+            if isinstance(interaction, dict)
+        ]
 
         address = data.get("address", {})
         location = ""
         if isinstance(address, dict):
             location = address.get("addressLocality", "")
 
+        # Values come straight from page JSON and may not be strings, so this
+        # site keeps validation; the OpenGraph and text paths only build strs.
         return ProfileData(
             url=url,
             name=name,
@@ -77,24 +128,48 @@ def _parse_json_ld(soup: BeautifulSoup, url: str, tier: str) -> ProfileData | No
     return None
 
 
-def _parse_opengraph(soup: BeautifulSoup, url: str, tier: str) -> ProfileData | None:
-    og_title = soup.find("meta", property="og:title")
-    og_desc = soup.find("meta", property="og:description")
+def _scan_head_opengraph(html: str) -> tuple[str, str] | None:
+    """Incrementally parse <head> for (og:title, og:description).
+
+    Returns None unless both tags appear before </head>; the caller then
+    falls back to the full-tree lookup.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag=("meta", "head"))
+    found: dict[str, str] = {}
+    try:
+        for start in range(0, len(html), _HEAD_CHUNK_CHARS):
+            parser.feed(html[start : start + _HEAD_CHUNK_CHARS])
+            for _, element in parser.read_events():
+                if element.tag == "head":
+                    return None
+                prop = element.get("property")
+                if prop in _OG_PROPERTIES:
+                    found.setdefault(prop, element.get("content", ""))
+                    if len(found) == len(_OG_PROPERTIES):
+                        return found["og:title"], found["og:description"]
+    except (etree.LxmlError, ValueError):
+        pass
+    return None
+
 
-    title = og_title.get("content", "") if og_title else ""
-    desc = og_desc.get("content", "") if og_desc else ""
+def _parse_opengraph(tree: lxml.html.HtmlElement, url: str, tier: str) -> ProfileData | None:
+    return _opengraph_profile(_OG_TITLE_XPATH(tree), _OG_DESC_XPATH(tree), url, tier)
 
+
+def _opengraph_profile(title: str, desc: str, url: str, tier: str) -> ProfileData | None:
     if not title:
         return None
 
     # LinkedIn og:title is typically "Name - Title - Company | LinkedIn"
-    name = title.split(" - ")[0].strip() if " - " in title else title.replace(" | LinkedIn", "").strip()
-    headline = ""
-    if " - " in title:
-        parts = title.split(" - ")
-        headline = " - ".join(parts[1:]).replace(" | LinkedIn", "").strip()
-
-    return ProfileData(
+    name, sep, rest = title.partition(" - ")
+    if sep:
+        name = name.strip()
+        headline = rest.replace(" | LinkedIn", "").strip()
+    else:
+        name = title.replace(" | LinkedIn", "").strip()
+        headline = ""
+
+    return ProfileData.model_construct(
         url=url,
         name=name,
         headline=headline,
@@ -104,32 +179,22 @@ def _parse_opengraph(soup: BeautifulSoup, url: str, tier: str) -> ProfileData |
 
 
 def _parse_plain_text(text: str, url: str, tier: str = "manual") -> ProfileData:
-    lines = [line.strip() for line in text.strip().split("\n") if line.strip()]
+    lines = list(filter(None, map(str.strip, text.splitlines())))
+    return _parse_lines(lines, url, tier)
+
+
+def _parse_lines(lines: list[str], url: str, tier: str) -> ProfileData:
+    """Build a profile from already-stripped, non-empty text lines."""
     name = lines[0] if lines else ""
     headline = lines[1] if len(lines) > 1 else ""
 
     # Try to find experience/education sections
+    lowered = [line.lower() for line in lines]
+    experience = _find_section(lines, lowered, *_EXPERIENCE_SECTION)[:500]
+    education = _find_section(lines, lowered, *_EDUCATION_SECTION)[:300]
     full_text = "\n".join(lines)
-    experience = ""
-    education = ""
-
-    exp_match = re.search(
-        r"(?:Experience|Work Experience)\s*\n([\s\S]*?)(?:\n(?:Education|Skills|$))",
-        full_text,
-        re.IGNORECASE,
-    )
-    if exp_match:
-        experience = exp_match.group(1).strip()[:500]
 
-    edu_match = re.search(
-        r"Education\s*\n([\s\S]*?)(?:\n(?:Skills|Interests|$))",
-        full_text,
-        re.IGNORECASE,
-    )
-    if edu_match:
-        education = edu_match.group(1).strip()[:300]
-
-    return ProfileData(
+    return ProfileData.model_construct(
         url=url,
         name=name,
         headline=headline,
@@ -139,3 +204,17 @@ def _parse_plain_text(text: str, url: str, tier: str = "manual") -> ProfileData:
         raw_text=full_text[:2000],
         scrape_tier=tier,
     )
+
+
+def _find_section(
+    lines: list[str], lowered: list[str], header: str, stops: tuple[str, ...]
+) -> str:
+    """Single linear scan over the lines; no regex, so no backtracking on odd input."""
+    # The header needs at least one line after it to have a body
+    for start in range(len(lines) - 1):
+        if lowered[start].endswith(header):
+            end = start + 2
+            while end < len(lines) and not lowered[end].startswith(stops):
+                end += 1
+            return "\n".join(lines[start + 1 : end])
+    return ""
@@ -1,27 +1,95 @@
 from __future__ import annotations
 
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
 from duckduckgo_search import DDGS
 
+from app.config import settings
 from app.models.schemas import ProfileData, ResearchResult
+from app.services.cache import TTLCache
+
+# DDGS is blocking; keep it off the loop's default executor so a burst of
+# searches can't starve other run_in_executor/to_thread users. The pool size
+# also caps how many searches hit DuckDuckGo at once.
+_ddgs_pool: ThreadPoolExecutor | None = None
+
+# Concurrent profiles often issue the same company query; identical searches
+# share one in-flight lookup and successful snippets are reused briefly.
+_SEARCH_CACHE_TTL = 30.0
+_SEARCH_CACHE: TTLCache[tuple[str, int], list[str]] = TTLCache(
+    ttl=_SEARCH_CACHE_TTL, maxsize=256
+)
+_in_flight: dict[tuple[str, int], asyncio.Task[list[str]]] = {}
+
+# Enough context for one opener; research stops once this many snippets arrive
+TARGET_SNIPPETS = 6
+# Bare-name searches for very short names ("Al", "Li") only return noise
+_MIN_FALLBACK_NAME_LEN = 4
+
+# One DDGS session per pool thread, reused across queries so its HTTP client
+# keeps connections and cookies. DDGS holds nothing that needs closing.
+_thread_state = threading.local()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the search thread pool, creating it on first use."""
+    global _ddgs_pool
+    if _ddgs_pool is None:
+        _ddgs_pool = ThreadPoolExecutor(
+            max_workers=max(settings.research_concurrency, 1),
+            thread_name_prefix="ddgs",
+        )
+    return _ddgs_pool
+
+
+async def aclose() -> None:
+    """Stop the search thread pool; called on application shutdown."""
+    global _ddgs_pool
+    if _ddgs_pool is not None:
+        _ddgs_pool.shutdown(wait=False, cancel_futures=True)
+        _ddgs_pool = None
+
+
+def _get_ddgs() -> DDGS:
+    ddgs = getattr(_thread_state, "ddgs", None)
+    if ddgs is None:
+        ddgs = _thread_state.ddgs = DDGS()
+    return ddgs
 
 
 def _search_sync(query: str, max_results: int) -> list[str]:
     try:
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
+        results = list(_get_ddgs().text(query, max_results=max_results))
         return [r.get("body", "") for r in results if r.get("body")]
     except Exception:
+        # Start the next query on a fresh session in case this one is poisoned
+        _thread_state.ddgs = None
         return []
 
 
-async def _search_async(query: str, max_results: int = 3) -> ResearchResult:
+async def _run_search(key: tuple[str, int]) -> list[str]:
     loop = asyncio.get_running_loop()
-    snippets = await loop.run_in_executor(
-        None, partial(_search_sync, query, max_results)
-    )
+    snippets = await loop.run_in_executor(_get_pool(), partial(_search_sync, *key))
+    # Empty results usually mean DDG rate-limited us; let the next caller retry
+    if snippets:
+        _SEARCH_CACHE.set(key, snippets)
+    return snippets
+
+
+async def _search_async(query: str, max_results: int = 3) -> ResearchResult:
+    key = (query, max_results)
+    snippets = _SEARCH_CACHE.get(key)
+    if snippets is None:
+        task = _in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(_run_search(key))
+            _in_flight[key] = task
+            task.add_done_callback(lambda _: _in_flight.pop(key, None))
+        # Shielded so one cancelled waiter doesn't cancel the lookup for the rest
+        snippets = await asyncio.shield(task)
     return ResearchResult(query=query, snippets=snippets)
 
 
@@ -67,7 +135,7 @@ def _build_queries(profile: ProfileData, depth: str) -> list[str]:
                 queries.append(
                     f'"{name}" "{company}" blog OR post OR article OR interview'
                 )
-        else:
+        elif len(name) >= _MIN_FALLBACK_NAME_LEN:
             queries.append(f'"{name}" professional')
             queries.append(f'"{name}" news')
 
@@ -82,6 +150,28 @@ async def research_prospect(
         return []
 
     max_results = 3
-    tasks = [_search_async(q, max_results) for q in queries]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return [r for r in results if isinstance(r, ResearchResult) and r.snippets]
+    tasks = [asyncio.create_task(_search_async(q, max_results)) for q in queries]
+    found = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception:
+                continue
+            found += len(result.snippets)
+            if found >= TARGET_SNIPPETS:
+                break
+    finally:
+        # Searches still running are not worth waiting for
+        for task in tasks:
+            task.cancel()
+
+    # Keep query order so the primary query's snippets lead the prompt
+    return [
+        task.result()
+        for task in tasks
+        if task.done()
+        and not task.cancelled()
+        and task.exception() is None
+        and task.result().snippets
+    ]
@@ -50,7 +50,7 @@ async function runGeneration(urls, manualProfiles) {
     };
 
     try {
-        const resp = await fetch("/api/generate", {
+        const resp = await fetch("/api/generate/stream", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify(payload),
@@ -61,8 +61,17 @@ async function runGeneration(urls, manualProfiles) {
             throw new Error(err.detail || `Server error ${resp.status}`);
         }
 
-        const data = await resp.json();
-        currentResults = data.results;
+        // Results arrive one per line as each profile finishes; show them right away
+        currentResults = new Array(urls.length);
+        let received = 0;
+        for await (const r of readNdjson(resp)) {
+            const slot = urls.findIndex((u, i) => u === r.url && !currentResults[i]);
+            if (slot === -1) continue;
+            currentResults[slot] = r;
+            received++;
+            progressText.textContent = `Processed ${received} of ${urls.length}...`;
+            renderResults(currentResults);
+        }
 
         // Check for failed scrapes that need manual input
         const failed = currentResults.filter((r) => r.scrape_tier === "failed" && !manualProfiles[r.url]);
@@ -80,6 +89,24 @@ async function runGeneration(urls, manualProfiles) {
     }
 }
 
+async function* readNdjson(resp) {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+            if (line.trim()) yield JSON.parse(line);
+        }
+    }
+    buffer += decoder.decode();
+    if (buffer.trim()) yield JSON.parse(buffer);
+}
+
 function renderResults(results) {
     resultsBody.innerHTML = "";
     resultsSection.classList.remove("hidden");